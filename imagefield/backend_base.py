@@ -2,6 +2,7 @@
 
 import io
 from abc import ABC, abstractmethod
+from types import MappingProxyType
 from typing import BinaryIO, NamedTuple
 
 
@@ -30,57 +31,53 @@ def calculate_crop_box(image_width, image_height, target_width, target_height, p
     ppoi_x_axis = int(image_width * ppoi[0])
     ppoi_y_axis = int(image_height * ppoi[1])
 
-    # Calculate aspect ratios
-    orig_aspect_ratio = float(image_width) / float(image_height)
-    crop_aspect_ratio = float(target_width) / float(target_height)
-
-    # Figure out if we're trimming from the left/right or top/bottom
-    if orig_aspect_ratio >= crop_aspect_ratio:
+    # Compare aspect ratios by cross-multiplying; integer math is exact.
+    # Rounded divisions use (2 * a + b) // (2 * b) == round-half-up of a / b,
+    # extreme aspect ratios still have to crop at least one pixel
+    if image_width * target_height >= image_height * target_width:
         # Image is wider than needed, crop from left/right sides
-        crop_width = int((crop_aspect_ratio * float(image_height)) + 0.5)
+        crop_width = max(
+            1, (2 * target_width * image_height + target_height) // (2 * target_height)
+        )
         crop_height = image_height
         crop_top = 0
-        crop_left = ppoi_x_axis - (crop_width // 2)
-
         # Keep crop box within image boundaries
-        if crop_left < 0:
-            crop_left = 0
-        elif crop_left + crop_width > image_width:
-            crop_left = image_width - crop_width
+        crop_left = max(0, min(image_width - crop_width, ppoi_x_axis - crop_width // 2))
     else:
         # Image is taller than needed, crop from top/bottom sides
         crop_width = image_width
-        crop_height = int((float(image_width) / crop_aspect_ratio) + 0.5)
+        crop_height = max(
+            1, (2 * target_height * image_width + target_width) // (2 * target_width)
+        )
         crop_left = 0
-        crop_top = ppoi_y_axis - (crop_height // 2)
-
         # Keep crop box within image boundaries
-        if crop_top < 0:
-            crop_top = 0
-        elif crop_top + crop_height > image_height:
-            crop_top = image_height - crop_height
+        crop_top = max(
+            0, min(image_height - crop_height, ppoi_y_axis - crop_height // 2)
+        )
 
     return CropBox(crop_left, crop_top, crop_width, crop_height)
 
 
-# Standard format name to file extension mapping
-FORMAT_EXTENSIONS = {
-    "JPEG": "jpg",
-    "PNG": "png",
-    "GIF": "gif",
-    "TIFF": "tif",
-    "TIF": "tif",
-    "WEBP": "webp",
-    "BMP": "bmp",
-    "ICO": "ico",
-    "PDF": "pdf",
-    "SVG": "svg",
-    "HEIF": "heif",
-    "HEIC": "heic",
-    "AVIF": "avif",
-    "JP2": "jp2",
-    "J2K": "j2k",
-}
+# Standard format name to file extension mapping (read-only)
+FORMAT_EXTENSIONS = MappingProxyType(
+    {
+        "JPEG": "jpg",
+        "PNG": "png",
+        "GIF": "gif",
+        "TIFF": "tif",
+        "TIF": "tif",
+        "WEBP": "webp",
+        "BMP": "bmp",
+        "ICO": "ico",
+        "PDF": "pdf",
+        "SVG": "svg",
+        "HEIF": "heif",
+        "HEIC": "heic",
+        "AVIF": "avif",
+        "JP2": "jp2",
+        "J2K": "j2k",
+    }
+)
 
 
 class ImageBackend(ABC):
@@ -105,6 +102,22 @@ class ImageBackend(ABC):
             IOError: If image cannot be opened or is invalid
         """
 
+    def open_for_processing(self, file: BinaryIO, context):
+        """Open image which will be run through processors.
+
+        Defaults to ``open()``. Override in backends which open images
+        differently for validation and for processing.
+
+        Args:
+            file: File-like object
+            context: Processing context, backends may store state for their
+                processors on it
+
+        Returns:
+            Native image object
+        """
+        return self.open(file)
+
     @abstractmethod
     def save(self, image, fp: BinaryIO, format: str, **kwargs) -> None:
         """Save native image object to file-like object.
@@ -149,6 +162,9 @@ class ImageBackend(ABC):
     def name(self) -> str:
         """Backend identifier.
 
+        Concrete backends should use a plain class attribute; it is read for
+        every processed image.
+
         Returns:
             Backend name: 'pillow' or 'vips'
         """
@@ -158,6 +174,8 @@ class ImageBackend(ABC):
     def processors(self) -> dict:
         """Return the processor registry dict for this backend.
 
+        Concrete backends should cache the value, e.g. using ``cached_property``.
+
         Returns:
             Dictionary mapping processor names to processor functions
         """
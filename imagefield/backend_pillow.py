@@ -1,9 +1,9 @@
 """Pillow backend for django-imagefield."""
 
-import io
+from functools import cached_property
 from typing import BinaryIO
 
-from PIL import Image, ImageFile
+from PIL import Image
 
 from imagefield.backend_base import ImageBackend
 
@@ -14,6 +14,8 @@ class PillowBackend(ImageBackend):
     Default backend that provides 100% backward compatibility with existing code.
     """
 
+    name = "pillow"
+
     def open(self, file: str | BinaryIO | bytes):
         """Open image using PIL.Image.open.
 
@@ -29,11 +31,11 @@ class PillowBackend(ImageBackend):
         return Image.open(file)
 
     def save(self, image, fp: BinaryIO, format: str, **kwargs) -> None:
-        """Save PIL image to file-like object with MAXBLOCK workaround.
+        """Save PIL image to file-like object.
 
-        Implements workaround for large images by temporarily increasing
-        MAXBLOCK if initial save fails. See:
-        https://github.com/python-imaging/Pillow/issues/148
+        Pillow sizes the output buffer for progressive and optimized JPEGs
+        itself, so ``ImageFile.MAXBLOCK`` doesn't have to be raised anymore.
+        See: https://github.com/python-imaging/Pillow/issues/148
 
         Args:
             image: PIL.Image.Image object
@@ -44,24 +46,15 @@ class PillowBackend(ImageBackend):
         Raises:
             IOError: If image cannot be saved
         """
-        original = ImageFile.MAXBLOCK
-
-        try:
-            try:
-                image.save(fp, format=format, **kwargs)
-            except OSError:
-                # Increase MAXBLOCK temporarily and try again.
-                # See https://github.com/python-imaging/Pillow/issues/148
-                ImageFile.MAXBLOCK *= 16
-                image.save(fp, format=format, **kwargs)
-        finally:
-            ImageFile.MAXBLOCK = original
+        image.save(fp, format=format, **kwargs)
 
     def verify_supported(self, image) -> bool:
-        """Verify image is valid by exercising PIL machinery.
+        """Verify image is valid by decoding it once.
 
-        Tests the image by resizing to small thumbnail and attempting
-        to save in multiple formats to ensure it's not broken.
+        ``Image.verify()`` would leave the image unusable for the caller and
+        does not notice truncated JPEG data, so the pixel data is loaded
+        instead. Nothing is encoded, but formats which Pillow can only read
+        (e.g. XPM) are rejected since processed images couldn't be saved.
 
         Args:
             image: PIL.Image.Image object
@@ -72,13 +65,13 @@ class PillowBackend(ImageBackend):
         Raises:
             ValueError: If image is broken or unsupported
         """
-        # Anything which exercises the machinery so that we may
-        # find out whether the image works at all (or not)
-        thumb = image.resize((10, 10)).convert("RGB")
-        with io.BytesIO() as target:
-            self.save(thumb, target, format=image.format or "JPEG")
-            self.save(thumb, target, format="PNG")
-            self.save(thumb, target, format="TIFF")
+        try:
+            image.load()
+        except (OSError, SyntaxError, Image.DecompressionBombError) as exc:
+            raise ValueError(str(exc)) from exc
+        Image.init()
+        if image.format not in Image.SAVE:
+            raise ValueError(f"Saving {image.format} images is not supported")
         return True
 
     def get_format(self, image) -> str:
@@ -92,12 +85,7 @@ class PillowBackend(ImageBackend):
         """
         return image.format or "JPEG"
 
-    @property
-    def name(self) -> str:
-        """Backend identifier."""
-        return "pillow"
-
-    @property
+    @cached_property
     def processors(self) -> dict:
         """Return Pillow processor registry."""
         from imagefield.processing_pillow import PILLOW_PROCESSORS  # noqa: PLC0415
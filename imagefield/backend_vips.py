@@ -1,5 +1,7 @@
 """pyvips backend for django-imagefield."""
 
+import os
+from functools import cached_property
 from typing import BinaryIO
 
 import pyvips
@@ -7,6 +9,79 @@ import pyvips
 from imagefield.backend_base import ImageBackend
 
 
+def _jpeg_save_kwargs(kwargs):
+    vips_kwargs = {}
+    if "quality" in kwargs:
+        vips_kwargs["Q"] = kwargs["quality"]
+    if kwargs.get("progressive"):
+        vips_kwargs["interlace"] = True
+    if kwargs.get("optimize"):
+        vips_kwargs["optimize_coding"] = True
+    return vips_kwargs
+
+
+def _png_save_kwargs(kwargs):
+    return {"compression": 9} if kwargs.get("optimize") else {}
+
+
+def _webp_save_kwargs(kwargs):
+    vips_kwargs = {}
+    if "quality" in kwargs:
+        vips_kwargs["Q"] = kwargs["quality"]
+    if kwargs.get("lossless"):
+        vips_kwargs["lossless"] = True
+    return vips_kwargs
+
+
+#: Format name -> (saver method, function translating PIL-style save kwargs)
+_SAVE_DISPATCH = {
+    "JPEG": ("jpegsave_buffer", _jpeg_save_kwargs),
+    "PNG": ("pngsave_buffer", _png_save_kwargs),
+    "WEBP": ("webpsave_buffer", _webp_save_kwargs),
+}
+
+
+def _local_path(file):
+    """Return the absolute filesystem path backing a file-like object, if any.
+
+    Django's ``FieldFile.name`` is relative to the storage, but the wrapped
+    file from ``FileSystemStorage`` carries the absolute path. Large uploads
+    are streamed to a temporary file whose path is available through
+    ``temporary_file_path()``. Relative names are ignored since they would be
+    resolved against the working directory.
+    """
+    for candidate in (file, getattr(file, "file", None)):
+        if hasattr(candidate, "temporary_file_path"):
+            return candidate.temporary_file_path()
+        name = getattr(candidate, "name", None)
+        if isinstance(name, str) and os.path.isabs(name) and os.path.isfile(name):
+            return name
+    return None
+
+
+#: vips-loader metadata -> standard format name
+_LOADER_FORMATS = {
+    "jpegload": "JPEG",
+    "jpegload_buffer": "JPEG",
+    "pngload": "PNG",
+    "pngload_buffer": "PNG",
+    "gifload": "GIF",
+    "gifload_buffer": "GIF",
+    "tiffload": "TIFF",
+    "tiffload_buffer": "TIFF",
+    "webpload": "WEBP",
+    "webpload_buffer": "WEBP",
+    "heifload": "HEIF",
+    "heifload_buffer": "HEIF",
+    "svgload": "SVG",
+    "svgload_buffer": "SVG",
+    "pdfload": "PDF",
+    "pdfload_buffer": "PDF",
+    "jp2kload": "JP2",
+    "jp2kload_buffer": "JP2",
+}
+
+
 class VipsBackend(ImageBackend):
     """pyvips backend implementation.
 
@@ -14,11 +89,20 @@ class VipsBackend(ImageBackend):
     Optional backend that requires pyvips to be installed.
     """
 
-    def open(self, file: str | BinaryIO | bytes):
+    name = "vips"
+
+    def open(self, file: str | BinaryIO | bytes, *, random_access=False):
         """Open image using pyvips.
 
+        Images are opened for sequential access by default, which allows
+        libvips to stream pixels through the pipeline instead of decoding the
+        whole image first. Pixels may only be read once, top to bottom
+        though, which is enough for validating images.
+
         Args:
             file: File path, file-like object, or bytes
+            random_access: Open the image for random access, e.g. when it
+                has to be rotated by 90 degrees or read repeatedly
 
         Returns:
             pyvips.Image object
@@ -26,15 +110,16 @@ class VipsBackend(ImageBackend):
         Raises:
             IOError: If image cannot be opened or is invalid
         """
+        access = "random" if random_access else "sequential"
         if isinstance(file, str):
-            return pyvips.Image.new_from_file(file)
+            return pyvips.Image.new_from_file(file, access=access)
         elif hasattr(file, "read"):
-            # Try to get a file path to avoid reading into memory
-            if hasattr(file, "name") and isinstance(file.name, str):
+            # Loading from the filesystem avoids reading the file into memory
+            # and allows libvips to use shrink-on-load later.
+            if path := _local_path(file):
                 try:
-                    # Django File objects and similar have .name with file path
-                    return pyvips.Image.new_from_file(file.name)
-                except (pyvips.Error, OSError):
+                    return pyvips.Image.new_from_file(path, access=access)
+                except pyvips.Error:
                     # Fall back to buffer if path doesn't work
                     pass
 
@@ -43,44 +128,111 @@ class VipsBackend(ImageBackend):
             # Rewind file for potential subsequent operations
             if hasattr(file, "seek"):
                 file.seek(0)
-            return pyvips.Image.new_from_buffer(data, "")
+            return pyvips.Image.new_from_buffer(data, "", access=access)
         else:
             # Assume bytes
-            return pyvips.Image.new_from_buffer(file, "")
-
-    def _vips_save_args(self, format: str, kwargs: dict) -> tuple[str, dict]:
-        """Return (suffix, vips_kwargs) for the given PIL-style format and kwargs."""
-        suffix = f".{self.get_extension(format.upper())}"
-        vips_kwargs = {}
-        if format.upper() == "JPEG":
-            if "quality" in kwargs:
-                vips_kwargs["Q"] = kwargs["quality"]
-            if kwargs.get("progressive"):
-                vips_kwargs["interlace"] = True
-            if kwargs.get("optimize"):
-                vips_kwargs["optimize_coding"] = True
-        elif format.upper() == "PNG":
-            if kwargs.get("optimize"):
-                vips_kwargs["compression"] = 9
-        elif format.upper() == "WEBP":
-            if "quality" in kwargs:
-                vips_kwargs["Q"] = kwargs["quality"]
-            if kwargs.get("lossless"):
-                vips_kwargs["lossless"] = True
-        return suffix, vips_kwargs
+            return pyvips.Image.new_from_buffer(file, "", access=access)
+
+    def open_for_processing(self, file: BinaryIO, context):
+        """Open image for random access.
+
+        Processors such as ``autorotate`` have to read pixels out of order.
+        Thumbnails are loaded separately using ``open_for_thumbnail``, so
+        this doesn't decode anything when resizing. Images without a file on
+        disk are loaded from a buffer which is kept on the context as
+        ``context.vips_source`` for shrink-on-load, together with the image.
+        """
+        if _local_path(file) is None:
+            data = file.read()
+            image = pyvips.Image.new_from_buffer(data, "", access="random")
+            context.vips_source = (image, data)
+            return image
+        return self.open(file, random_access=True)
+
+    @staticmethod
+    def open_for_thumbnail(image, width: int, height: int, *, buffer=None, **options):
+        """Load a downscaled copy of an image straight from its file.
+
+        libvips can shrink JPEG and WebP images while decoding them, which is
+        much faster than decoding at full size and resizing afterwards. This
+        only works for images which have not been modified since loading them
+        from a file or from ``buffer``; returns ``None`` for all other images.
+
+        Args:
+            image: pyvips.Image object as returned by ``open()``
+            width: Maximum width
+            height: Maximum height
+            buffer: The bytes ``image`` has been loaded from, if any
+            **options: Additional options for ``pyvips.Image.thumbnail``
+                (defaults to ``size="down"``)
+
+        Returns:
+            pyvips.Image object or ``None``
+        """
+        options = {"size": "down", "no_rotate": True} | options
+        # Images loaded from buffers have no filename at all
+        if image.filename is None:
+            if buffer is None:
+                return None
+            return pyvips.Image.thumbnail_buffer(
+                buffer, width, height=height, **options
+            )
+        # Images produced by operations get a relative "temp-N" filename,
+        # which must not be resolved against the working directory
+        if not os.path.isabs(image.filename) or not os.path.isfile(image.filename):
+            return None
+        return pyvips.Image.thumbnail(image.filename, width, height=height, **options)
 
     def save_to_bytes(self, image, format: str, **kwargs) -> bytes:
-        suffix, vips_kwargs = self._vips_save_args(format, kwargs)
-        return image.write_to_buffer(suffix, **vips_kwargs)
+        format = format.upper()
+        try:
+            saver, save_kwargs = _SAVE_DISPATCH[format]
+        except KeyError:
+            # Uncommon formats go through libvips' suffix lookup
+            return image.write_to_buffer(f".{self.get_extension(format)}")
+        return getattr(image, saver)(**save_kwargs(kwargs))
 
     def save(self, image, fp: BinaryIO, format: str, **kwargs) -> None:
-        fp.write(self.save_to_bytes(image, format, **kwargs))
+        format = format.upper()
+        if format not in _SAVE_DISPATCH:
+            # Savers for uncommon formats (e.g. TIFF) may seek in their output
+            fp.write(self.save_to_bytes(image, format, **kwargs))
+            return
+        # Stream the encoded image into fp instead of building bytes first.
+        # Chunks are cffi buffers which not all file-like objects accept.
+        # libvips needs the number of bytes written, but file-like objects
+        # such as HttpResponse return None; exceptions raised by fp.write
+        # would be reported as a generic write error.
+        errors = []
+
+        def on_write(chunk):
+            try:
+                fp.write(bytes(chunk))
+            except Exception as exc:  # noqa: BLE001
+                errors.append(exc)
+                return -1
+            return len(chunk)
+
+        target = pyvips.TargetCustom()
+        target.on_write(on_write)
+        try:
+            image.write_to_target(
+                target,
+                f".{self.get_extension(format)}",
+                **_SAVE_DISPATCH[format][1](kwargs),
+            )
+        except pyvips.Error:
+            if errors:
+                raise errors[0] from None
+            raise
 
     def verify_supported(self, image) -> bool:
-        thumb = image.thumbnail_image(10, height=10).colourspace("srgb")
-        thumb.write_to_buffer(".jpg", Q=90)
-        thumb.write_to_buffer(".png")
-        thumb.write_to_buffer(".tif")
+        # avg() has to compute every pixel, which is enough to find out
+        # whether the image decodes at all without running any encoder.
+        try:
+            image.avg()
+        except pyvips.Error as exc:
+            raise ValueError(str(exc)) from exc
         return True
 
     def get_format(self, image) -> str:
@@ -92,40 +244,14 @@ class VipsBackend(ImageBackend):
         Returns:
             Standard format name (JPEG, PNG, GIF, etc.)
         """
-        # Try to get vips-loader metadata
         try:
             loader = image.get("vips-loader")
-            format_map = {
-                "jpegload": "JPEG",
-                "jpegload_buffer": "JPEG",
-                "pngload": "PNG",
-                "pngload_buffer": "PNG",
-                "gifload": "GIF",
-                "gifload_buffer": "GIF",
-                "tiffload": "TIFF",
-                "tiffload_buffer": "TIFF",
-                "webpload": "WEBP",
-                "webpload_buffer": "WEBP",
-                "heifload": "HEIF",
-                "heifload_buffer": "HEIF",
-                "svgload": "SVG",
-                "svgload_buffer": "SVG",
-                "pdfload": "PDF",
-                "pdfload_buffer": "PDF",
-                "jp2kload": "JP2",
-                "jp2kload_buffer": "JP2",
-            }
-            return format_map.get(loader, "JPEG")
         except pyvips.Error:
             # If vips-loader is not set, default to JPEG
             return "JPEG"
+        return _LOADER_FORMATS.get(loader, "JPEG")
 
-    @property
-    def name(self) -> str:
-        """Backend identifier."""
-        return "vips"
-
-    @property
+    @cached_property
     def processors(self) -> dict:
         """Return vips processor registry."""
         from imagefield.processing_vips import VIPS_PROCESSORS  # noqa: PLC0415
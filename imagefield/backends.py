@@ -3,12 +3,12 @@
 Provides factory function to get the configured backend (Pillow or pyvips).
 """
 
-from django.conf import settings
-
+import functools
 
-_backend_instance = None
+from django.conf import settings
 
 
+@functools.cache
 def get_backend():
     """Get current backend singleton.
 
@@ -22,29 +22,25 @@ def get_backend():
         ImportError: If pyvips backend is selected but pyvips is not installed
         ValueError: If unknown backend name is specified
     """
-    global _backend_instance  # noqa: PLW0603
-    if _backend_instance is None:
-        backend_name = settings.IMAGEFIELD_BACKEND.lower()
-
-        if backend_name == "pillow":
-            from imagefield.backend_pillow import PillowBackend  # noqa: PLC0415
+    backend_name = settings.IMAGEFIELD_BACKEND.lower()
 
-            _backend_instance = PillowBackend()
-        elif backend_name == "vips":
-            try:
-                from imagefield.backend_vips import VipsBackend  # noqa: PLC0415
+    if backend_name == "pillow":
+        from imagefield.backend_pillow import PillowBackend  # noqa: PLC0415
 
-                _backend_instance = VipsBackend()
-            except ImportError as e:
-                raise ImportError(
-                    "pyvips not installed. Install with: pip install pyvips"
-                ) from e
-        else:
-            raise ValueError(
-                f"Unknown backend: {backend_name}. Valid options are: 'pillow', 'vips'"
-            )
+        return PillowBackend()
+    elif backend_name == "vips":
+        try:
+            from imagefield.backend_vips import VipsBackend  # noqa: PLC0415
 
-    return _backend_instance
+            return VipsBackend()
+        except ImportError as e:
+            raise ImportError(
+                "pyvips not installed. Install with: pip install pyvips"
+            ) from e
+    else:
+        raise ValueError(
+            f"Unknown backend: {backend_name}. Valid options are: 'pillow', 'vips'"
+        )
 
 
 def reset_backend():
@@ -52,8 +48,7 @@ def reset_backend():
 
     Used for testing to allow switching backends within test suite.
     """
-    global _backend_instance  # noqa: PLW0603
-    _backend_instance = None
+    get_backend.cache_clear()
 
 
 __all__ = ["get_backend", "reset_backend"]
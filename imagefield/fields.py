@@ -164,6 +164,11 @@ class _NonclosingProxy:
     def readable(self):
         return True
 
+    @property
+    def file(self):
+        # Lets backends find the path of temporary uploads
+        return self._f.file
+
     def close(self):
         pass  # intentional no-op — caller owns the file's lifetime
 
@@ -285,14 +290,18 @@ class ImageFieldFile(files.ImageFieldFile):
         try:
             backend = get_backend()
             with self.open("rb") as file:
-                image = backend.open(file)
+                image = backend.open_for_processing(file, context)
+                # Processors modify save_kwargs in place; give each run its own
+                # dict so that nothing leaks into dicts shared by specs.
+                context.save_kwargs = dict(context.save_kwargs)
                 context.save_kwargs.setdefault("format", backend.get_format(image))
 
                 handler = build_handler(context.processors, registry=backend.processors)
                 image = handler(image, context)
 
-                format_name = context.save_kwargs.pop("format")
-                return backend.save_to_bytes(image, format_name, **context.save_kwargs)
+                save_kwargs = dict(context.save_kwargs)
+                format_name = save_kwargs.pop("format")
+                return backend.save_to_bytes(image, format_name, **save_kwargs)
 
         finally:
             self.name = orig_name
@@ -1,9 +1,20 @@
 """Image processors for pyvips backend."""
 
+import math
+
+# Importing these modules registers the bundled shared processors
+from imagefield import webp, websafe  # noqa: F401
 from imagefield.backend_base import calculate_crop_box
+from imagefield.processing_pillow import (
+    _DEFAULT_CHAIN,
+    SHARED_PROCESSORS,
+    _identity,
+    _Registry,
+    build_handler,
+)
 
 
-VIPS_PROCESSORS = {}
+VIPS_PROCESSORS = _Registry(SHARED_PROCESSORS)
 
 
 def register_vips(fn):
@@ -12,24 +23,13 @@ def register_vips(fn):
     return fn
 
 
-# Import build_handler for use by default processor
-from imagefield.processing_pillow import build_handler  # noqa: E402
-
-
 @register_vips
 def default(get_image):
     """Default processing pipeline for vips backend."""
-    return build_handler(
-        [
-            "preserve_icc_profile",
-            "process_gif",
-            "process_png",
-            "process_jpeg",
-            "autorotate",
-        ],
-        get_image,
-        registry=VIPS_PROCESSORS,
-    )
+    if get_image is _identity:
+        # The plain ["default"] chain is cached by build_handler
+        return build_handler(_DEFAULT_CHAIN, registry=VIPS_PROCESSORS)
+    return build_handler(_DEFAULT_CHAIN, get_image, registry=VIPS_PROCESSORS)
 
 
 @register_vips
@@ -37,11 +37,34 @@ def autorotate(get_image):
     """Automatically rotate image based on EXIF orientation."""
 
     def processor(image, context):
-        return get_image(image.autorot(), context)
+        # autorot() returns a copy even if there's nothing to do, which would
+        # also disable shrink-on-load in thumbnail and crop. 1 means upright.
+        if image.get_typeof("orientation") and image.get("orientation") != 1:
+            rotated = image.autorot()
+            # Remember the unrotated image so that thumbnail and crop can
+            # still shrink on load and rotate the much smaller result
+            context.vips_autorotated = (rotated, image)
+            image = rotated
+        return get_image(image, context)
 
     return processor
 
 
+def _open_for_thumbnail(image, context, width, height, **options):
+    autorotated = getattr(context, "vips_autorotated", None)
+    if autorotated and autorotated[0] is image:
+        image = autorotated[1]
+        options["no_rotate"] = False
+    # Set by VipsBackend.open_for_processing for images loaded from buffers
+    source = getattr(context, "vips_source", None)
+    if source and source[0] is image:
+        options["buffer"] = source[1]
+    # Imported here so that registering processors doesn't load libvips
+    from imagefield.backend_vips import VipsBackend  # noqa: PLC0415
+
+    return VipsBackend.open_for_thumbnail(image, width, height, **options)
+
+
 @register_vips
 def process_jpeg(get_image):
     """Process JPEG images - convert to RGB/grayscale, set quality."""
@@ -66,36 +89,19 @@ def process_jpeg(get_image):
 
 @register_vips
 def process_png(get_image):
-    """Process PNG images - convert palette mode to RGBA."""
+    """Process PNG images - nothing to do for vips.
 
-    def processor(image, context):
-        # Only convert palette/indexed images, like Pillow backend
-        # In vips, indexed/palette images typically have bands < 3
-        if context.save_kwargs["format"] == "PNG" and image.bands < 3:
-            # Convert to sRGB (RGB)
-            image = image.colourspace("srgb")
-            # Add alpha channel for consistency with Pillow's RGBA conversion
-            if not image.hasalpha():
-                image = image.addalpha()
-
-        return get_image(image, context)
-
-    return processor
+    libvips already expands palette images to RGB(A) when loading them, unlike
+    Pillow. Grayscale images stay grayscale since PNG supports it natively.
+    """
+    return get_image
 
 
 @register_vips
 def process_gif(get_image):
     """Process GIF images - preserve transparency and palette."""
-
-    def processor(image, context):
-        if context.save_kwargs["format"] != "GIF":
-            return get_image(image, context)
-
-        # pyvips handles GIF transparency automatically
-        # Just pass through
-        return get_image(image, context)
-
-    return processor
+    # pyvips handles GIF transparency automatically, nothing to do
+    return get_image
 
 
 @register_vips
@@ -106,12 +112,8 @@ def preserve_icc_profile(get_image):
     so this is a no-op for compatibility with the Pillow backend's
     processing pipeline.
     """
-
-    def processor(image, context):
-        # vips preserves ICC profiles automatically - nothing to do
-        return get_image(image, context)
-
-    return processor
+    # vips preserves ICC profiles automatically - nothing to do
+    return get_image
 
 
 @register_vips
@@ -120,12 +122,11 @@ def thumbnail(get_image, size):
 
     def processor(image, context):
         image = get_image(image, context)
-        # Calculate scale factor
-        f = min(1.0, size[0] / image.width, size[1] / image.height)
-        # Use thumbnail_image which is optimized for downscaling
-        new_width = int(f * image.width)
-        new_height = int(f * image.height)
-        return image.thumbnail_image(new_width, height=new_height)
+        # Use shrink-on-load if the image is still unmodified
+        if (thumb := _open_for_thumbnail(image, context, *size)) is not None:
+            return thumb
+        # size="down" never upscales, like Pillow's Image.thumbnail
+        return image.thumbnail_image(size[0], height=size[1], size="down")
 
     return processor
 
@@ -138,13 +139,34 @@ def crop(get_image, size):
     def processor(image, context):
         image = get_image(image, context)
 
+        if list(context.ppoi) == [0.5, 0.5]:
+            # libvips crops around the centre itself while resizing
+            options = {"size": "both", "crop": "centre"}
+            thumb = _open_for_thumbnail(image, context, width, height, **options)
+            if thumb is None:
+                thumb = image.thumbnail_image(width, height=height, **options)
+            return thumb
+
+        # Reading properties of vips images isn't free, only do it once
+        image_width, image_height = image.width, image.height
+
+        # Shrink on load to the smallest size still covering the crop
+        f = max(width / image_width, height / image_height)
+        if f < 1:
+            thumb = _open_for_thumbnail(
+                image, context, math.ceil(f * image_width), math.ceil(f * image_height)
+            )
+            if thumb is not None:
+                image = thumb
+                image_width, image_height = image.width, image.height
+
         # Calculate crop box using shared function
-        box = calculate_crop_box(image.width, image.height, width, height, context.ppoi)
+        box = calculate_crop_box(image_width, image_height, width, height, context.ppoi)
 
         # vips crop uses (left, top, width, height) format
         cropped_image = image.crop(box.left, box.top, box.width, box.height)
 
         # Resize to exact dimensions
-        return cropped_image.thumbnail_image(width, height=height)
+        return cropped_image.thumbnail_image(width, height=height, size="force")
 
     return processor
@@ -1,17 +1,7 @@
-from imagefield.processing_pillow import register_pillow
+from imagefield.processing_pillow import register_all
 
 
-# Register with both backends since this processor only manipulates context
-try:
-    from imagefield.processing_vips import register_vips
-except ImportError:
-    # vips backend not available, that's OK
-    def register_vips(fn):
-        return fn
-
-
-@register_pillow
-@register_vips
+@register_all
 def force_jpeg(get_image):
     def processor(image, context):
         context.save_kwargs["format"] = "JPEG"
@@ -22,12 +12,16 @@ def force_jpeg(get_image):
     return processor
 
 
+WEBSAFE_EXTENSIONS = frozenset({".png", ".gif", ".jpg", ".jpeg"})
+
+
 def websafe(processors, extensions=None):
-    extensions = extensions or {".png", ".gif", ".jpg", ".jpeg"}
+    extensions = frozenset(extensions) if extensions else WEBSAFE_EXTENSIONS
 
     def spec(fieldfile, context):
         # XXX image type match would be SO much better instead of checking extensions
-        if context.extension.lower() in extensions:
+        extension = context.extension
+        if extension in extensions or extension.lower() in extensions:
             context.processors = processors
         else:
             context.extension = ".jpg"
@@ -1,12 +1,26 @@
 """Tests for backend abstraction layer."""
 
 import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
 
 import pyvips
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.http import HttpResponse
 from django.test import TestCase, override_settings
 from PIL import Image as PILImage
 
+from imagefield.backend_base import CropBox, calculate_crop_box
 from imagefield.backends import get_backend, reset_backend
+from imagefield.fields import Context
+from imagefield.processing import PILLOW_PROCESSORS, build_handler
+from imagefield.processing_pillow import SHARED_PROCESSORS, register_all
 from imagefield.processing_vips import VIPS_PROCESSORS
 
 
@@ -23,6 +37,21 @@ class BackendTestCase(TestCase):
         backend = get_backend()
         self.assertEqual(backend.name, "pillow")
 
+    def test_processors_do_not_import_pyvips(self):
+        """Importing fields and vips processors doesn't load libvips."""
+        code = (
+            "import sys, django; django.setup();"
+            " import imagefield.fields, imagefield.processing_vips;"
+            " sys.exit('pyvips' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.dirname(__file__)),
+            env=os.environ | {"DJANGO_SETTINGS_MODULE": "testapp.settings"},
+            check=False,
+        )
+        self.assertEqual(result.returncode, 0)
+
     def test_backend_singleton(self):
         """Backend should be a singleton."""
         backend1 = get_backend()
@@ -71,6 +100,35 @@ class BackendTestCase(TestCase):
         self.assertIn("crop", processors)
 
 
+class CropBoxTestCase(TestCase):
+    """Test the crop box calculation shared by all backends."""
+
+    def test_calculate_crop_box(self):
+        """Crop boxes keep the target aspect ratio and stay inside the image."""
+        self.assertEqual(
+            calculate_crop_box(400, 300, 100, 100, (0.5, 0.5)),
+            CropBox(50, 0, 300, 300),
+        )
+        self.assertEqual(
+            calculate_crop_box(400, 300, 100, 100, (0.0, 0.5)),
+            CropBox(0, 0, 300, 300),
+        )
+        self.assertEqual(
+            calculate_crop_box(300, 400, 200, 100, (0.5, 1.0)),
+            CropBox(0, 250, 300, 150),
+        )
+        # Rounds half up
+        self.assertEqual(
+            calculate_crop_box(5, 3, 1, 2, (0.5, 0.5)),
+            CropBox(1, 0, 2, 3),
+        )
+        # Never empty
+        self.assertEqual(
+            calculate_crop_box(300, 200, 1000, 1, (0.5, 0.5)),
+            CropBox(0, 100, 300, 1),
+        )
+
+
 class PillowBackendTestCase(TestCase):
     """Test Pillow backend functionality."""
 
@@ -132,6 +190,32 @@ class PillowBackendTestCase(TestCase):
         # Should not raise
         self.assertTrue(self.backend.verify_supported(opened))
 
+    def test_verify_supported_truncated(self):
+        """Truncated images should be rejected with a ValueError."""
+        img = PILImage.new("RGB", (100, 100), color="green")
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG")
+
+        opened = self.backend.open(io.BytesIO(buf.getvalue()[:-200]))
+        with self.assertRaisesRegex(ValueError, "image file is truncated"):
+            self.backend.verify_supported(opened)
+
+    def test_verify_supported_read_only_format(self):
+        """Formats Pillow cannot save should be rejected with a ValueError."""
+        xpm = (
+            b"/* XPM */\n"
+            b"static char *image[] = {\n"
+            b'"2 2 1 1",\n'
+            b'"a c #ff0000",\n'
+            b'"aa",\n'
+            b'"aa"\n'
+            b"};\n"
+        )
+        opened = self.backend.open(io.BytesIO(xpm))
+        self.assertEqual(opened.format, "XPM")
+        with self.assertRaisesRegex(ValueError, "Saving XPM images is not supported"):
+            self.backend.verify_supported(opened)
+
 
 class VipsBackendTestCase(TestCase):
     """Test pyvips backend functionality."""
@@ -158,8 +242,7 @@ class VipsBackendTestCase(TestCase):
         img = PILImage.new("RGB", (100, 100), color="red")
         buf = io.BytesIO()
         img.save(buf, format="JPEG")
-        buf.seek(0)
-        data = buf.read()
+        data = buf.getvalue()
 
         # Open with vips backend
         opened = self.backend.open(data)
@@ -181,6 +264,71 @@ class VipsBackendTestCase(TestCase):
         self.assertEqual(opened.width, 100)
         self.assertEqual(opened.height, 100)
 
+    def test_open_image_from_django_file(self):
+        """Backend should load files with a filesystem path directly."""
+        path = os.path.join(settings.MEDIA_ROOT, "python-logo.jpg")
+        with open(path, "rb") as f:
+            opened = self.backend.open(File(f, name="python-logo.jpg"))
+        self.assertEqual(opened.filename, path)
+
+    def test_open_image_from_temporary_upload(self):
+        """Backend should load uploads streamed to disk from their path."""
+        with open(os.path.join(settings.MEDIA_ROOT, "python-logo.jpg"), "rb") as f:
+            data = f.read()
+        with TemporaryUploadedFile(
+            "python-logo.jpg", "image/jpeg", len(data), None
+        ) as upload:
+            upload.write(data)
+            upload.seek(0)
+            opened = self.backend.open(upload)
+            self.assertEqual(opened.filename, upload.temporary_file_path())
+
+    def test_open_image_random_access(self):
+        """Images opened for random access may be read repeatedly."""
+        path = os.path.join(settings.MEDIA_ROOT, "python-logo.jpg")
+        opened = self.backend.open(path, random_access=True)
+        self.assertEqual(opened.avg(), opened.avg())
+        self.assertAlmostEqual(opened.crop(0, 0, 10, 10).avg(), 255, delta=1)
+
+    def test_open_for_processing(self):
+        """Images opened for processing may be rotated by 90 degrees."""
+        path = os.path.join(
+            settings.MEDIA_ROOT, "exif-orientation-examples", "Landscape_6.jpg"
+        )
+        with open(path, "rb") as f:
+            opened = self.backend.open(File(f))
+            with self.assertRaisesRegex(pyvips.Error, "out of order read"):
+                opened.autorot().jpegsave_buffer()
+
+            f.seek(0)
+            context = Context()
+            opened = self.backend.open_for_processing(File(f), context)
+            self.assertFalse(hasattr(context, "vips_source"))
+            rotated = pyvips.Image.new_from_buffer(
+                opened.autorot().jpegsave_buffer(), ""
+            )
+            self.assertEqual((rotated.width, rotated.height), (600, 450))
+
+    def test_open_for_processing_from_buffer(self):
+        """The source buffer is kept on the context for shrink-on-load."""
+        path = os.path.join(settings.MEDIA_ROOT, "python-logo.jpg")
+        with open(path, "rb") as f:
+            buf = io.BytesIO(f.read())
+        context = Context(ppoi=(0.5, 0.5), save_kwargs={"format": "JPEG"})
+        opened = self.backend.open_for_processing(buf, context)
+        self.assertIs(context.vips_source[0], opened)
+        self.assertEqual(context.vips_source[1], buf.getvalue())
+
+        with patch.object(
+            pyvips.Image, "thumbnail_buffer", wraps=pyvips.Image.thumbnail_buffer
+        ) as thumbnail_buffer:
+            handler = build_handler(
+                ["default", ("thumbnail", (100, 50))], registry=VIPS_PROCESSORS
+            )
+            result = handler(opened, context)
+        self.assertEqual((result.width, result.height), (50, 50))
+        thumbnail_buffer.assert_called_once()
+
     def test_get_format_jpeg(self):
         """Backend should detect JPEG format."""
         img = PILImage.new("RGB", (100, 100), color="red")
@@ -239,6 +387,22 @@ class VipsBackendTestCase(TestCase):
         verified = PILImage.open(out_buf)
         self.assertEqual(verified.format, "PNG")
 
+    def test_save_to_any_file_like(self):
+        """Saving works with writers returning None and re-raises their errors."""
+        path = os.path.join(settings.MEDIA_ROOT, "python-logo.jpg")
+        vips_img = self.backend.open(path)
+
+        response = HttpResponse()
+        self.backend.save(vips_img, response, "JPEG", quality=90)
+        self.assertEqual(response.content[:2], b"\xff\xd8")
+
+        class BrokenWriter:
+            def write(self, data):
+                raise OSError("disk full")
+
+        with self.assertRaisesRegex(OSError, "disk full"):
+            self.backend.save(self.backend.open(path), BrokenWriter(), "JPEG")
+
     def test_verify_supported(self):
         """Backend should verify valid images."""
         img = PILImage.new("RGB", (100, 100), color="green")
@@ -287,6 +451,87 @@ class VipsBackendTestCase(TestCase):
         self.assertLessEqual(result.width, 200)
         self.assertLessEqual(result.height, 150)
 
+    def test_build_handler_cache(self):
+        """Handler chains are cached per registry."""
+        spec = ["default", ("crop", (20, 20))]
+        handler = build_handler(spec, registry=VIPS_PROCESSORS)
+        self.assertIs(handler, build_handler(spec, registry=VIPS_PROCESSORS))
+        self.assertIsNot(handler, build_handler(spec))
+
+        # Modifying the registry drops cached chains, also when patching it
+        with patch.dict(VIPS_PROCESSORS, {"crop": VIPS_PROCESSORS["thumbnail"]}):
+            patched = build_handler(spec, registry=VIPS_PROCESSORS)
+            self.assertIsNot(handler, patched)
+        self.assertIsNot(patched, build_handler(spec, registry=VIPS_PROCESSORS))
+
+        # Plain dicts aren't cached at all
+        registry = dict(VIPS_PROCESSORS)
+        self.assertIsNot(
+            build_handler(spec, registry=registry),
+            build_handler(spec, registry=registry),
+        )
+
+    def test_register_all(self):
+        """Shared processors are registered with both backends."""
+
+        def unregister():
+            for registry in (PILLOW_PROCESSORS, VIPS_PROCESSORS, SHARED_PROCESSORS):
+                registry.pop("test_shared_processor", None)
+
+        self.addCleanup(unregister)
+
+        @register_all
+        def test_shared_processor(get_image):
+            return get_image
+
+        self.assertIs(PILLOW_PROCESSORS["test_shared_processor"], test_shared_processor)
+        self.assertIs(VIPS_PROCESSORS["test_shared_processor"], test_shared_processor)
+        self.assertIn("force_jpeg", VIPS_PROCESSORS)
+
+    def test_crop_processor(self):
+        """Crop processor should produce the exact size for any PPOI."""
+        path = os.path.join(settings.MEDIA_ROOT, "python-logo.jpg")
+
+        for point in [(0.5, 0.5), (0.2, 0.8)]:
+
+            class Context:
+                ppoi = point
+                save_kwargs = {}
+
+            processor = VIPS_PROCESSORS["crop"](lambda img, ctx: img, (120, 80))
+            result = processor(self.backend.open(path), Context())
+            self.assertEqual((result.width, result.height), (120, 80))
+
+    def test_open_for_thumbnail(self):
+        """Unmodified images loaded from files use shrink-on-load."""
+        path = os.path.join(settings.MEDIA_ROOT, "python-logo.jpg")
+        vips_img = self.backend.open(path)
+
+        thumb = self.backend.open_for_thumbnail(vips_img, 100, 50)
+        self.assertEqual((thumb.width, thumb.height), (50, 50))
+
+        # Derived images have to be resized the regular way
+        derived = vips_img.invert()
+        self.assertIsNone(self.backend.open_for_thumbnail(derived, 100, 50))
+
+        # ... even if a file with their name exists in the working directory
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                shutil.copyfile(path, derived.filename)
+                self.assertIsNone(self.backend.open_for_thumbnail(derived, 100, 50))
+            finally:
+                os.chdir(cwd)
+
+        # Images loaded from buffers work too if the buffer is passed
+        with open(path, "rb") as f:
+            data = f.read()
+        vips_img = self.backend.open(data)
+        self.assertIsNone(self.backend.open_for_thumbnail(vips_img, 100, 50))
+        thumb = self.backend.open_for_thumbnail(vips_img, 100, 50, buffer=data)
+        self.assertEqual((thumb.width, thumb.height), (50, 50))
+
     def test_autorotate_processor(self):
         """Autorotate processor should handle EXIF orientation."""
 
@@ -310,7 +555,38 @@ class VipsBackendTestCase(TestCase):
         processor = autorotate_fn(lambda img, ctx: img)
         result = processor(vips_img, context)
 
-        self.assertIsNotNone(result)
+        # Upright images are passed through unchanged
+        self.assertIs(result, vips_img)
+
+        path = os.path.join(
+            settings.MEDIA_ROOT, "exif-orientation-examples", "Landscape_6.jpg"
+        )
+        vips_img = self.backend.open(path)
+        result = processor(vips_img, context)
+        self.assertEqual(
+            (result.width, result.height), (vips_img.height, vips_img.width)
+        )
+
+    def test_autorotate_thumbnail(self):
+        """Rotated images are shrunk on load and rotated afterwards."""
+        path = os.path.join(
+            settings.MEDIA_ROOT, "exif-orientation-examples", "Landscape_6.jpg"
+        )
+        context = Context(ppoi=(0.2, 0.8), save_kwargs={"format": "JPEG"})
+
+        with patch.object(
+            pyvips.Image, "thumbnail", wraps=pyvips.Image.thumbnail
+        ) as thumbnail:
+            for spec, size in [
+                (["default", ("thumbnail", (300, 300))], (300, 225)),
+                (["default", ("crop", (100, 50))], (100, 50)),
+            ]:
+                handler = build_handler(spec, registry=VIPS_PROCESSORS)
+                result = handler(self.backend.open(path), context)
+                self.assertEqual((result.width, result.height), size)
+
+        self.assertEqual(thumbnail.call_count, 2)
+        self.assertFalse(thumbnail.call_args.kwargs["no_rotate"])
 
     def test_process_jpeg_processor(self):
         """process_jpeg should set quality and progressive."""
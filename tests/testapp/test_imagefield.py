@@ -25,6 +25,7 @@ from imagefield.fields import (
     ImageFieldFile,
     _SealableAttribute,
 )
+from imagefield.processing import build_handler
 from testapp.models import (
     Model,
     ModelWithOptional,
@@ -38,8 +39,11 @@ from testapp.utils import BaseTest, contents, openimage
 
 
 class Test(BaseTest):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("admin", "admin@test.ch", "blabla")
+
     def login(self):
-        self.user = User.objects.create_superuser("admin", "admin@test.ch", "blabla")
         client = Client()
         client.force_login(self.user)
         return client
@@ -195,6 +199,22 @@ class Test(BaseTest):
         field._clear_generated_files(m)
         self.assertEqual(contents("__processed__"), [])
 
+    def test_jpeg_grayscale_and_transparency(self):
+        """JPEG processing keeps grayscale, flattens transparency onto white"""
+        handler = build_handler(["process_jpeg"])
+
+        context = Context(save_kwargs={"format": "JPEG"})
+        image = handler(Image.new("L", (10, 10), 128), context)
+        self.assertEqual(image.mode, "L")
+        self.assertEqual(context.save_kwargs["quality"], 90)
+
+        image = handler(Image.new("RGBA", (10, 10), (255, 0, 0, 0)), context)
+        self.assertEqual(image.mode, "RGB")
+        self.assertEqual(image.getpixel((0, 0)), (255, 255, 255))
+
+        image = handler(Image.new("CMYK", (10, 10)), context)
+        self.assertEqual(image.mode, "RGB")
+
     def test_indexed_png(self):
         """PNG with P(alette) is converted to RGBA"""
         field = Model._meta.get_field("image")
@@ -373,6 +393,18 @@ class Test(BaseTest):
             ],
         )
 
+    def test_shared_save_kwargs(self):
+        """Processing does not modify save_kwargs dicts set by specs"""
+        save_kwargs = {"quality": 50}
+
+        def spec(fieldfile, context):
+            context.save_kwargs = save_kwargs
+            context.processors = ["default", ("thumbnail", (20, 20))]
+
+        m = Model(image="python-logo.jpg")
+        m.image.process(spec)
+        self.assertEqual(save_kwargs, {"quality": 50})
+
     def test_adhoc_lowlevel(self):
         """Low-level processing pipelines; no saving of generated images"""
         m = Model.objects.create(image="python-logo.jpg")
@@ -545,6 +577,12 @@ class Test(BaseTest):
         self.assertEqual(contents("__processed__"), ["cmyk-24f8702383e7.jpg"])
         # ["cmyk-24f8702383e7.jpg", "python-logo-24f8702383e7.jpg"],
 
+    def test_build_handler_cache(self):
+        """Handler chains are only compiled once per processor spec"""
+        handler = build_handler(["default", ("thumbnail", (20, 20))])
+        self.assertIs(handler, build_handler(["default", ["thumbnail", [20, 20]]]))
+        self.assertIsNot(handler, build_handler(["default", ("crop", (20, 20))]))
+
     def test_context(self):
         self.assertTrue(isinstance(Context.ppoi, _SealableAttribute))
         self.assertEqual(f"{Context()}", "Context(_is_sealed=False)")
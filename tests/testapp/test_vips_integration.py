@@ -5,10 +5,13 @@ with the pyvips backend.
 """
 
 import io
+import os
 from unittest.mock import patch
 
 import pyvips
+from django.conf import settings
 from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
 from django.test.utils import override_settings
 from PIL import Image
 
@@ -16,22 +19,34 @@ from imagefield.backends import get_backend, reset_backend
 from imagefield.processing_pillow import PILLOW_PROCESSORS
 from imagefield.processing_vips import VIPS_PROCESSORS, register_vips
 from testapp.models import Model, WebsafeImage
-from testapp.utils import BaseTest
+from testapp.utils import BaseTest, contents
+
+
+def _encode(mode, size, format, color=0, **kwargs):
+    image = Image.new(mode, size, color=color)
+    if mode == "P":
+        image.putpalette(bytes(range(256)) * 3)
+    buf = io.BytesIO()
+    image.save(buf, format=format, **kwargs)
+    return buf.getvalue()
 
 
 @override_settings(IMAGEFIELD_BACKEND="vips")
-class VipsIntegrationTest(BaseTest):
-    """Test that ImageField works correctly with vips backend."""
+class VipsBackendTest(SimpleTestCase):
+    """Test that the vips backend is selected, without touching the database."""
 
-    def setUp(self):
-        """Reset backend before each test."""
+    @classmethod
+    def setUpClass(cls):
+        """Reset backend and encode the synthetic test image once."""
+        super().setUpClass()
         reset_backend()
-        super().setUp()
+        cls.jpeg = _encode("RGB", (100, 100), "JPEG", "red")
 
-    def tearDown(self):
-        """Reset backend after each test."""
+    @classmethod
+    def tearDownClass(cls):
+        """Reset backend so that later tests get the Pillow backend again."""
         reset_backend()
-        super().tearDown()
+        super().tearDownClass()
 
     def test_backend_is_vips(self):
         """Verify tests are actually using vips backend."""
@@ -41,18 +56,10 @@ class VipsIntegrationTest(BaseTest):
     def test_processing_uses_vips_images(self):
         """Verify that image processing uses pyvips.Image objects, not PIL."""
 
-        # Verify we're using vips
         backend = get_backend()
-        self.assertEqual(backend.name, "vips")
-
-        # Create a test image
-        img = Image.new("RGB", (200, 150), color="red")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG")
-        buf.seek(0)
 
         # Open with backend and verify it returns pyvips.Image
-        opened = backend.open(buf.read())
+        opened = backend.open(self.jpeg)
         self.assertIsInstance(
             opened, pyvips.Image, "Backend should return pyvips.Image"
         )
@@ -92,16 +99,9 @@ class VipsIntegrationTest(BaseTest):
             return processor
 
         backend = get_backend()
-        self.assertEqual(backend.name, "vips")
-
-        # Create test image
-        img = Image.new("RGB", (100, 100), color="blue")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG")
-        buf.seek(0)
 
         # Open and process with our custom processor
-        vips_img = backend.open(buf.read())
+        vips_img = backend.open(self.jpeg)
 
         # Mock context
         class Context:
@@ -119,31 +119,58 @@ class VipsIntegrationTest(BaseTest):
         self.assertEqual(received_image_type[0], "Image")  # pyvips.Image.__name__
         self.assertIsInstance(result, pyvips.Image)
 
-    def test_pillow_backend_never_used(self):
+    @patch(
+        "imagefield.backend_pillow.PillowBackend",
+        side_effect=AssertionError(
+            "PillowBackend should never be instantiated when using vips backend"
+        ),
+    )
+    def test_pillow_backend_never_used(self, mock_pillow):
         """Ensure PillowBackend is never instantiated when using vips."""
 
-        # Patch PillowBackend to raise if instantiated
-        with patch("imagefield.backend_pillow.PillowBackend") as mock_pillow:
-            mock_pillow.side_effect = AssertionError(
-                "PillowBackend should never be instantiated when using vips backend"
-            )
+        # Reset and get backend - should use vips, not pillow
+        reset_backend()
+        backend = get_backend()
+
+        # Verify we got vips backend
+        self.assertEqual(backend.name, "vips")
+
+        # PillowBackend should never have been called
+        mock_pillow.assert_not_called()
 
-            # Reset and get backend - should use vips, not pillow
-            reset_backend()
-            backend = get_backend()
 
-            # Verify we got vips backend
-            self.assertEqual(backend.name, "vips")
+@override_settings(IMAGEFIELD_BACKEND="vips")
+class VipsIntegrationTest(BaseTest):
+    """Test that ImageField works correctly with vips backend."""
 
-            # PillowBackend should never have been called
-            mock_pillow.assert_not_called()
+    @classmethod
+    def setUpClass(cls):
+        """Reset backend and encode the synthetic test images once."""
+        super().setUpClass()
+        reset_backend()
+        cls.FIXTURES = {
+            "jpeg_100x100": _encode("RGB", (100, 100), "JPEG", "red"),
+            "jpeg_400x300": _encode("RGB", (400, 300), "JPEG", "green"),
+            "jpeg_800x600": _encode("RGB", (800, 600), "JPEG", "red"),
+            "jpeg_4k": _encode("RGB", (3840, 2160), "JPEG", "cyan", quality=85),
+            "png_100x100": _encode("RGB", (100, 100), "PNG", "blue"),
+            "png_400x300": _encode("RGB", (400, 300), "PNG", "blue"),
+            "gif_100x100": _encode("RGB", (100, 100), "GIF", "magenta"),
+            "gif_transparent_100x100": _encode("P", (100, 100), "GIF", transparency=0),
+            "cmyk_100x100": _encode("CMYK", (100, 100), "JPEG", (100, 50, 0, 0)),
+            "indexed_100x100": _encode("P", (100, 100), "PNG"),
+            "grayscale_100x100": _encode("L", (100, 100), "PNG", 128),
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        """Reset backend so that later tests get the Pillow backend again."""
+        reset_backend()
+        super().tearDownClass()
 
     def test_create_model_with_image(self):
         """Should be able to create model with image using vips backend."""
 
-        # Verify we're using vips
-        self.assertEqual(get_backend().name, "vips")
-
         m = Model.objects.create(image="python-logo.png")
         self.assertTrue(m.image)
         self.assertGreater(m.image.width, 0)
@@ -152,17 +179,8 @@ class VipsIntegrationTest(BaseTest):
     def test_upload_and_process_jpeg(self):
         """Should process JPEG images correctly with vips."""
 
-        # Verify we're using vips
-        self.assertEqual(get_backend().name, "vips")
-
-        # Create a test JPEG
-        img = Image.new("RGB", (800, 600), color="red")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG")
-        buf.seek(0)
-
         m = Model()
-        m.image.save("test.jpg", ContentFile(buf.read()), save=False)
+        m.image.save("test.jpg", ContentFile(self.FIXTURES["jpeg_800x600"]), save=False)
         m.save()
 
         # Should have processed the image
@@ -175,14 +193,8 @@ class VipsIntegrationTest(BaseTest):
 
     def test_upload_and_process_png(self):
         """Should process PNG images correctly with vips."""
-        # Create a test PNG
-        img = Image.new("RGB", (400, 300), color="blue")
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        buf.seek(0)
-
         m = Model()
-        m.image.save("test.png", ContentFile(buf.read()), save=False)
+        m.image.save("test.png", ContentFile(self.FIXTURES["png_400x300"]), save=False)
         m.save()
 
         # Should have processed the image
@@ -191,30 +203,32 @@ class VipsIntegrationTest(BaseTest):
 
     def test_indexed_png_conversion(self):
         """PNG with palette mode should be converted to RGBA with vips."""
-        # Create indexed PNG
-        img = Image.new("P", (100, 100))
-        img.putpalette([i % 256 for i in range(768)])
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        buf.seek(0)
-
         m = Model()
-        m.image.save("indexed.png", ContentFile(buf.read()), save=False)
+        m.image.save(
+            "indexed.png", ContentFile(self.FIXTURES["indexed_100x100"]), save=False
+        )
         m.save()
 
         # Should have processed without error
         self.assertTrue(m.image)
 
+    def test_grayscale_png(self):
+        """Grayscale PNGs should stay grayscale with vips."""
+        m = Model()
+        m.image.save(
+            "grayscale.png",
+            ContentFile(self.FIXTURES["grayscale_100x100"]),
+            save=False,
+        )
+        path = os.path.join(settings.MEDIA_ROOT, m.image.process("desktop"))
+        with Image.open(path) as image:
+            self.assertEqual(image.format, "PNG")
+            self.assertEqual(image.mode, "L")
+
     def test_cmyk_jpeg_conversion(self):
         """CMYK JPEG should be converted to RGB with vips."""
-        # Create CMYK JPEG
-        img = Image.new("CMYK", (100, 100), color=(100, 50, 0, 0))
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG")
-        buf.seek(0)
-
         m = Model()
-        m.image.save("cmyk.jpg", ContentFile(buf.read()), save=False)
+        m.image.save("cmyk.jpg", ContentFile(self.FIXTURES["cmyk_100x100"]), save=False)
         m.save()
 
         # Should have processed without error
@@ -236,14 +250,8 @@ class VipsIntegrationTest(BaseTest):
 
     def test_ppoi_cropping(self):
         """PPOI-based cropping should work with vips."""
-        # Create image with custom PPOI
-        img = Image.new("RGB", (400, 300), color="green")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG")
-        buf.seek(0)
-
         m = Model()
-        m.image.save("test.jpg", ContentFile(buf.read()), save=False)
+        m.image.save("test.jpg", ContentFile(self.FIXTURES["jpeg_400x300"]), save=False)
         m.ppoi = "0.2x0.8"  # Custom PPOI
         m.save()
 
@@ -258,15 +266,22 @@ class VipsIntegrationTest(BaseTest):
         m = Model.objects.create(image="python-logo.png")
         self.assertTrue(m.image)
 
+    def test_autorotate_without_resize(self):
+        """Rotating images without resizing them afterwards works with vips."""
+        for image in ["Landscape_3.jpg", "Landscape_6.jpg", "Landscape_8.jpg"]:
+            with self.subTest(image=image):
+                m = Model(image=f"exif-orientation-examples/{image}")
+                for spec in [["default"], ["default", "force_webp"], ["autorotate"]]:
+                    path = os.path.join(settings.MEDIA_ROOT, m.image.process(spec))
+                    with Image.open(path) as im:
+                        self.assertEqual(im.size, (600, 450))
+
     def test_progressive_jpeg(self):
         """Progressive JPEG should be created with vips."""
-        img = Image.new("RGB", (800, 600), color="yellow")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG")
-        buf.seek(0)
-
         m = Model()
-        m.image.save("progressive.jpg", ContentFile(buf.read()), save=False)
+        m.image.save(
+            "progressive.jpg", ContentFile(self.FIXTURES["jpeg_800x600"]), save=False
+        )
         m.save()
 
         # Should process without error
@@ -274,37 +289,27 @@ class VipsIntegrationTest(BaseTest):
 
     def test_delete_removes_generated_images(self):
         """Deleting image should remove generated thumbnails with vips."""
-        # Create a test image and save it (don't reference the fixture directly)
-        img = Image.new("RGB", (400, 300), color="green")
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        buf.seek(0)
-
         m = Model()
-        m.image.save("test-delete.png", ContentFile(buf.read()), save=False)
+        m.image.save(
+            "test-delete.png", ContentFile(self.FIXTURES["png_400x300"]), save=False
+        )
         m.save()
 
-        # Generate thumbnails
-        _ = m.image.thumb
-        _ = m.image.desktop
+        # Saving has generated both formats already
+        self.assertEqual(len(contents("__processed__")), 2)
 
         # Delete
         m.image.delete(save=False)
 
-        # Should have removed the image
+        # Should have removed the image and the generated formats
         self.assertFalse(m.image)
+        self.assertEqual(contents("__processed__"), [])
 
     def test_websafe_with_vips(self):
         """Websafe processing should work with vips backend."""
 
-        # Create a test image
-        img = Image.new("RGB", (400, 300), color="purple")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG")
-        buf.seek(0)
-
         m = WebsafeImage()
-        m.image.save("test.jpg", ContentFile(buf.read()), save=False)
+        m.image.save("test.jpg", ContentFile(self.FIXTURES["jpeg_400x300"]), save=False)
         m.save()
 
         # Should have processed the image
@@ -312,40 +317,24 @@ class VipsIntegrationTest(BaseTest):
 
     def test_format_detection(self):
         """Format should be correctly detected with vips."""
-        # Test JPEG
-        img = Image.new("RGB", (100, 100), color="red")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG")
-        buf.seek(0)
-
-        m = Model()
-        m.image.save("test.jpg", ContentFile(buf.read()), save=False)
-        m.save()
-
-        self.assertTrue(m.image.name.endswith(".jpg"))
-
-        # Test PNG
-        img = Image.new("RGB", (100, 100), color="blue")
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        buf.seek(0)
-
-        m2 = Model()
-        m2.image.save("test.png", ContentFile(buf.read()), save=False)
-        m2.save()
-
-        self.assertTrue(m2.image.name.endswith(".png"))
+        for name, fixture in [
+            ("test.jpg", "jpeg_100x100"),
+            ("test.png", "png_100x100"),
+            ("test.gif", "gif_100x100"),
+        ]:
+            with self.subTest(name=name):
+                m = Model()
+                m.image.save(name, ContentFile(self.FIXTURES[fixture]), save=False)
+                m.save()
+
+                extension = os.path.splitext(name)[1]
+                self.assertTrue(m.image.name.endswith(extension))
+                self.assertTrue(m.image.thumb.endswith(extension))
 
     def test_large_image_processing(self):
         """Large images should be processed efficiently with vips."""
-        # Create a large image (4K)
-        img = Image.new("RGB", (3840, 2160), color="cyan")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG", quality=85)
-        buf.seek(0)
-
         m = Model()
-        m.image.save("large.jpg", ContentFile(buf.read()), save=False)
+        m.image.save("large.jpg", ContentFile(self.FIXTURES["jpeg_4k"]), save=False)
         m.save()
 
         # Should process without error
@@ -355,15 +344,15 @@ class VipsIntegrationTest(BaseTest):
 
     def test_gif_with_transparency(self):
         """GIF with transparency should be handled with vips."""
-        # Create a simple GIF
-        img = Image.new("RGB", (100, 100), color="magenta")
-        buf = io.BytesIO()
-        img.save(buf, format="GIF")
-        buf.seek(0)
-
         m = Model()
-        m.image.save("test.gif", ContentFile(buf.read()), save=False)
+        m.image.save(
+            "test.gif",
+            ContentFile(self.FIXTURES["gif_transparent_100x100"]),
+            save=False,
+        )
         m.save()
 
-        # Should process without error
-        self.assertTrue(m.image)
+        path = os.path.join(settings.MEDIA_ROOT, m.image.process("desktop"))
+        with Image.open(path) as image:
+            self.assertEqual(image.format, "GIF")
+            self.assertEqual(image.convert("RGBA").getpixel((0, 0))[3], 0)